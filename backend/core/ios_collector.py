@@ -1,10 +1,16 @@
 import asyncio
+import hashlib
 import time
 import os
-from typing import Dict, Any, Callable, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Union
 from loguru import logger
 from tidevice import Device
 from tidevice._perf import Performance, DataType
+from core.models import MonitorPacket
+
+# 电池信息查询间隔 (秒)
+_BATTERY_POLL_INTERVAL = 15
 
 class IOSCollector:
     def __init__(self, udid: str):
@@ -13,7 +19,7 @@ class IOSCollector:
         self.perf = None
         self.running = False
         self.target_bundle_id = None
-        self._callback: Callable[[Dict[str, Any]], None] = None
+        self._callback: Callable[[Union[MonitorPacket, Dict[str, Any]]], None] = None
         
         # 缓存最新的数据
         self._current_data = {
@@ -22,6 +28,12 @@ class IOSCollector:
             "fps": 0,
             "gpu": 0.0
         }
+        # 电量变化缓慢, get_value 是阻塞的 usbmux 往返, 每 15 秒查询一次并缓存
+        self._battery_cache = {"level": 0, "temp": 0}
+        self._battery_last = 0.0
+        # 截图编码使用独立线程 (start() 中创建, stop() 时关闭); 记录上一帧的摘要, 画面未变化时不重复写文件和推送
+        self._shot_pool: Optional[ThreadPoolExecutor] = None
+        self._last_shot_hash = None
         
         # Prepare screenshot dir
         self.screenshot_dir = f"static/screenshots/{self.udid}"
@@ -53,6 +65,7 @@ class IOSCollector:
             return
 
         self.running = True
+        self._shot_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shot-{self.udid}")
         logger.info(f"Started iOS collection for {self.udid} on {self.target_bundle_id}")
 
         # tidevice Perf 是基于 callback 的，且运行在独立线程中
@@ -92,6 +105,8 @@ class IOSCollector:
                 self.perf.stop()
             except Exception:
                 pass
+        if self._shot_pool:
+            self._shot_pool.shutdown(wait=False, cancel_futures=True)
         logger.info(f"Stopped iOS collection for {self.udid}")
 
     async def _report_loop(self):
@@ -99,35 +114,19 @@ class IOSCollector:
             try:
                 timestamp = int(time.time() * 1000)
                 
-                # Get battery info (polling)
-                battery_info = {"level": 0, "temp": 0}
-                try:
-                    # com.apple.mobile.battery
-                    # Keys: BatteryCurrentCapacity, BatteryIsCharging, ExternalChargeCapable, BatteryTemperature (not always available)
-                    # Note: get_value is blocking, might slow down loop?
-                    # But loop is 1s, should be fine.
-                    bat_data = self.device.get_value(domain="com.apple.mobile.battery")
-                    if bat_data:
-                        level = bat_data.get("BatteryCurrentCapacity", 0)
-                        # BatteryTemperature is usually not exposed in standard battery domain on non-jailbroken, 
-                        # but sometimes "Temperature" is in IOPower?
-                        # Let's try basic level first.
-                        battery_info["level"] = level
-                except Exception:
-                    pass
+                # Get battery info (polling, cached)
+                if time.monotonic() - self._battery_last > _BATTERY_POLL_INTERVAL:
+                    self._battery_last = time.monotonic()
+                    await asyncio.get_running_loop().run_in_executor(None, self._refresh_battery)
+                battery_info = self._battery_cache
 
-                data = {
-                    "timestamp": timestamp,
-                    "package": self.target_bundle_id,
-                    "cpu": self._current_data["cpu"],
-                    "memory": self._current_data["memory"],
-                    "fps": self._current_data["fps"],
-                    "gpu": self._current_data["gpu"],
-                    "jank": 0,
-                    "stutter": 0,
-                    "battery": battery_info,
-                    "network": {"rx": 0, "tx": 0}
-                }
+                data = MonitorPacket(
+                    timestamp=timestamp,
+                    package=self.target_bundle_id,
+                    **self._current_data,
+                    battery=battery_info,
+                    network={"rx": 0, "tx": 0}
+                )
                 
                 if self._callback:
                     self._callback(data)
@@ -137,18 +136,31 @@ class IOSCollector:
             
             await asyncio.sleep(1)
 
+    def _refresh_battery(self):
+        try:
+            # com.apple.mobile.battery
+            # Keys: BatteryCurrentCapacity, BatteryIsCharging, ExternalChargeCapable, BatteryTemperature (not always available)
+            bat_data = self.device.get_value(domain="com.apple.mobile.battery")
+            if bat_data:
+                # BatteryTemperature is usually not exposed in standard battery domain on non-jailbroken, 
+                # but sometimes "Temperature" is in IOPower?
+                # Let's try basic level first.
+                self._battery_cache = {"level": bat_data.get("BatteryCurrentCapacity", 0), "temp": 0}
+        except Exception:
+            pass
+
     async def _screenshot_loop(self):
         while self.running:
             try:
-                loop = asyncio.get_event_loop()
+                loop = asyncio.get_running_loop()
                 timestamp = int(time.time() * 1000)
                 filename = f"{timestamp}.jpg"
                 filepath = f"{self.screenshot_dir}/{filename}"
                 
                 # tidevice screenshot
-                await loop.run_in_executor(None, self._take_screenshot, filepath)
+                changed = await loop.run_in_executor(self._shot_pool, self._take_screenshot, filepath)
                 
-                if self._callback:
+                if changed and self._callback:
                     self._callback({
                         "type": "screenshot",
                         "timestamp": timestamp,
@@ -159,12 +171,22 @@ class IOSCollector:
             
             await asyncio.sleep(2)
 
-    def _take_screenshot(self, path: str):
+    def _take_screenshot(self, path: str) -> bool:
+        """
+        截图并保存为 JPEG, 返回是否写入了新的一帧 (与上一帧相同则跳过)
+        """
         try:
-            # tidevice screenshot saves to file
-            self.device.screenshot(path)
+            # tidevice screenshot 返回 PIL Image
+            img = self.device.screenshot()
+            digest = hashlib.blake2b(img.tobytes(), digest_size=8).digest()
+            if digest == self._last_shot_hash:
+                return False
+            self._last_shot_hash = digest
+            img.convert("RGB").save(path, "JPEG", quality=40, optimize=False)
+            return True
         except Exception as e:
             logger.error(f"iOS Take screenshot failed: {e}")
+        return False
 
     @staticmethod
     def get_devices():
@@ -0,0 +1,36 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple
+
+# 录制 CSV 的表头, 与 MonitorPacket.csv_row() 的列顺序一一对应
+MONITOR_CSV_HEADER = (
+    "timestamp", "package", "cpu(%)", "memory(MB)", "fps", "jank", "stutter(%)",
+    "gpu(%)", "battery.level", "battery.voltage(mV)", "battery.temp(C)",
+    "battery.current(mA)", "network.rx(KB/s)", "network.tx(KB/s)"
+)
+
+@dataclass(slots=True)
+class MonitorPacket:
+    """
+    每秒一次的性能采样. orjson 可直接序列化 dataclass, 输出与原先的 monitor dict 相同
+    """
+    timestamp: int
+    package: Optional[str]
+    cpu: float = 0.0
+    memory: float = 0.0
+    memory_detail: Dict[str, float] = field(default_factory=dict)
+    fps: int = 0
+    jank: int = 0
+    stutter: float = 0.0
+    gpu: float = 0.0
+    battery: Dict[str, Any] = field(default_factory=dict)
+    network: Dict[str, float] = field(default_factory=dict)
+    type: str = "monitor"
+
+    def csv_row(self) -> Tuple:
+        battery = self.battery
+        network = self.network
+        return (
+            self.timestamp, self.package, self.cpu, self.memory, self.fps, self.jank, self.stutter,
+            self.gpu, battery.get("level"), battery.get("voltage"), battery.get("temp"),
+            battery.get("current"), network.get("rx"), network.get("tx"),
+        )
@@ -1,32 +1,69 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import json
 import asyncio
+import functools
 import os
-import shutil
+import re
 import csv
 import time
+import orjson
+from contextlib import asynccontextmanager
 from adbutils import adb
 from core.android_collector import AndroidCollector
 from core.ios_collector import IOSCollector
+from core.models import MonitorPacket, MONITOR_CSV_HEADER
 from loguru import logger
 from typing import Union
 
-app = FastAPI(title="VeloPerf Server")
+def _gc_old_screenshots(max_age: float):
+    """删除 static/screenshots/<serial>/ 下超过 max_age 秒的截图"""
+    cutoff = time.time() - max_age
+    removed = 0
+    with os.scandir(SCREENSHOT_DIR) as devices:
+        for device_dir in devices:
+            if not device_dir.is_dir():
+                continue
+            with os.scandir(device_dir.path) as shots:
+                for shot in shots:
+                    try:
+                        if shot.is_file() and shot.stat().st_mtime < cutoff:
+                            os.unlink(shot.path)
+                            removed += 1
+                    except OSError:
+                        pass
+    if removed:
+        logger.info(f"Removed {removed} old screenshots")
+
+def _log_cleanup_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception():
+        logger.error(f"Screenshot cleanup error: {future.exception()}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 旧截图可能很多, 放到线程中清理, 不阻塞服务启动
+    cleanup = asyncio.get_running_loop().run_in_executor(None, _gc_old_screenshots, SCREENSHOT_MAX_AGE)
+    cleanup.add_done_callback(_log_cleanup_error)
+    yield
+
+app = FastAPI(title="VeloPerf Server", lifespan=lifespan)
 
 # Ensure static/screenshots exists
 SCREENSHOT_DIR = "static/screenshots"
-if os.path.exists(SCREENSHOT_DIR):
-    # Clean up old screenshots on restart
-    shutil.rmtree(SCREENSHOT_DIR)
+# 启动后在后台清理超过该时长 (秒) 的旧截图
+SCREENSHOT_MAX_AGE = 3600
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
 app.mount("/screenshots", StaticFiles(directory=SCREENSHOT_DIR), name="screenshots")
 
 # Ensure static/records exists and mount
 RECORD_DIR = "static/records"
+# 录制 CSV 的 flush 间隔 (秒)
+RECORD_FLUSH_INTERVAL = 5
+# 每个 WebSocket 连接待发送消息的上限
+DATA_QUEUE_SIZE = 64
 os.makedirs(RECORD_DIR, exist_ok=True)
 app.mount("/records", StaticFiles(directory=RECORD_DIR), name="records")
 
@@ -38,9 +75,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# iOS UDID: 40 位十六进制, 或 新格式 00008030-001A2D9E0C38802E
+_IOS_UDID_RE = re.compile(r"^[0-9A-Fa-f-]{25,}$")
+
+@functools.lru_cache(maxsize=64)
+def _platform_of(serial: str) -> str:
+    """根据 serial 格式判断设备平台; Android serial (含 emulator-5554 等) 不会匹配 UDID 格式"""
+    return "ios" if _IOS_UDID_RE.match(serial) else "android"
+
 # 存储活跃的采集器实例
 collectors: Dict[str, Union[AndroidCollector, IOSCollector]] = {}
 
+# 应用列表只在安装/卸载时变化, 缓存 APPS_CACHE_TTL 秒; serial -> (过期时间, apps)
+APPS_CACHE_TTL = 60
+_apps_cache: Dict[str, Tuple[float, List[Dict[str, str]]]] = {}
+# iOS 设备名在连接期间不变, 设备断开后移出缓存
+_ios_name_cache: Dict[str, str] = {}
+
 @app.get("/api/devices")
 async def get_devices():
     """获取连接的设备列表"""
@@ -66,14 +117,17 @@ async def get_devices():
     try:
         ios_devices = IOSCollector.get_devices()
         for d in ios_devices:
-            model_name = "iOS Device"
-            try:
-                from tidevice import Device
-                dev = Device(d.udid)
-                # Try to get user defined name first
-                model_name = dev.name or "iOS Device"
-            except Exception:
-                pass
+            model_name = _ios_name_cache.get(d.udid)
+            if model_name is None:
+                model_name = "iOS Device"
+                try:
+                    from tidevice import Device
+                    dev = Device(d.udid)
+                    # Try to get user defined name first
+                    model_name = dev.name or "iOS Device"
+                    _ios_name_cache[d.udid] = model_name
+                except Exception:
+                    pass
                 
             devices.append({
                 "serial": d.udid,
@@ -81,6 +135,10 @@ async def get_devices():
                 "platform": "ios",
                 "status": "online"
             })
+        connected = {d.udid for d in ios_devices}
+        for udid in list(_ios_name_cache):
+            if udid not in connected:
+                del _ios_name_cache[udid]
     except Exception as e:
         logger.error(f"Failed to list iOS devices: {e}")
         
@@ -89,10 +147,18 @@ async def get_devices():
 @app.get("/api/apps/{serial}")
 async def get_apps(serial: str, platform: str = "android"):
     """获取设备上安装的应用列表"""
-    if platform == "ios" or (len(serial) > 20 or "-" in serial):
+    now = time.monotonic()
+    cached = _apps_cache.get(serial)
+    if cached and cached[0] > now:
+        return {"apps": cached[1]}
+
+    if platform == "ios" or _platform_of(serial) == "ios":
         apps = IOSCollector.get_installed_apps(serial)
     else:
         apps = AndroidCollector.get_installed_apps(serial)
+    # 查询失败时返回空列表, 不缓存
+    if apps:
+        _apps_cache[serial] = (now + APPS_CACHE_TTL, apps)
     return {"apps": apps}
 
 @app.get("/api/records/{serial}")
@@ -104,16 +170,17 @@ async def list_records(serial: str):
     
     files = []
     try:
-        for f in os.listdir(record_dir_serial):
-            if f.endswith(".csv"):
-                fp = os.path.join(record_dir_serial, f)
-                stat = os.stat(fp)
-                files.append({
-                    "name": f,
-                    "size": stat.st_size,
-                    "mtime": stat.st_mtime,
-                    "url": f"/records/{serial}/{f}"
-                })
+        # scandir 一次遍历即得到文件类型, DirEntry.stat() 结果会被缓存, 每个文件只 stat 一次
+        with os.scandir(record_dir_serial) as entries:
+            for entry in entries:
+                if entry.name.endswith(".csv") and entry.is_file():
+                    stat = entry.stat()
+                    files.append({
+                        "name": entry.name,
+                        "size": stat.st_size,
+                        "mtime": stat.st_mtime,
+                        "url": f"/records/{serial}/{entry.name}"
+                    })
         # Sort by mtime desc
         files.sort(key=lambda x: x["mtime"], reverse=True)
     except Exception as e:
@@ -121,6 +188,10 @@ async def list_records(serial: str):
         
     return {"files": files}
 
+def _send(websocket: WebSocket, obj):
+    # orjson 直接输出 UTF-8 JSON bytes, 以二进制帧发送, 省去 decode 为 str 的一次拷贝
+    return websocket.send_bytes(orjson.dumps(obj))
+
 @app.websocket("/ws/monitor/{serial}")
 async def websocket_endpoint(websocket: WebSocket, serial: str):
     await websocket.accept()
@@ -128,9 +199,7 @@ async def websocket_endpoint(websocket: WebSocket, serial: str):
     # Or frontend sends platform?
     # For simplicity, we can detect by serial format or check if exists in lists
     
-    platform = "android"
-    if len(serial) > 20 or "-" in serial: # Simple heuristic for iOS UDID
-        platform = "ios"
+    platform = _platform_of(serial)
         
     logger.info(f"WebSocket connected for device: {serial} ({platform})")
 
@@ -158,38 +227,55 @@ async def websocket_endpoint(websocket: WebSocket, serial: str):
     # 但为了 MVP 快速实现，我们重写一个 async generator 或者在 collector 内部通过 queue 传递数据
     
     # 采用 Queue 模式解耦
-    data_queue = asyncio.Queue()
-    
-    def queue_callback(data):
-        # 这里的 loop 是主线程 loop
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.call_soon_threadsafe(data_queue.put_nowait, data)
-        except RuntimeError:
-             # 如果在其他线程且没有 loop，可能需要 new_event_loop (不应发生)
-             pass
+    # 有界队列: 客户端消费过慢时丢弃最旧的消息, 保留最新数据, 避免内存无限增长
+    data_queue = asyncio.Queue(maxsize=DATA_QUEUE_SIZE)
 
-    collector.set_callback(queue_callback)
-    
-    # Defer start until receiving 'start' message to allow target package/bundle id to be set
     # Prepare recording resources
     record_dir_serial = os.path.join(RECORD_DIR, serial)
     os.makedirs(record_dir_serial, exist_ok=True)
     record_fp = None
     record_writer = None
+    record_last_flush = 0.0
+
+    def record_row(data):
+        nonlocal record_last_flush
+        try:
+            record_writer.writerow(data.csv_row())
+            # 行写入 64KB 缓冲, 每 5 秒 flush 一次; stop / 断开时再 flush
+            now = time.monotonic()
+            if now - record_last_flush > RECORD_FLUSH_INTERVAL:
+                record_fp.flush()
+                record_last_flush = now
+        except Exception as e:
+            logger.error(f"Record write error: {e}")
+
+    def put_latest(data):
+        # 在事件循环线程中执行, 与 get 之间没有竞争
+        # 录制在入队时写入, 客户端消费过慢导致的丢弃不影响 CSV 的完整性
+        if record_writer and isinstance(data, MonitorPacket):
+            record_row(data)
+        if data_queue.full():
+            data_queue.get_nowait()
+        data_queue.put_nowait(data)
+    
+    # 回调可能来自采集线程, 事件循环在此处取一次, 通过 call_soon_threadsafe 投递
+    loop = asyncio.get_running_loop()
+
+    def queue_callback(data):
+        loop.call_soon_threadsafe(put_latest, data)
+
+    collector.set_callback(queue_callback)
+    
+    # Defer start until receiving 'start' message to allow target package/bundle id to be set
+
+    # 同时等待 队列数据 和 WS 消息; 两个 task 跨循环复用, 只重建已完成的那一个,
+    # 避免每轮取消未完成的 receive_json 导致丢失已读取的数据
+    recv_task = asyncio.create_task(websocket.receive_json())
+    queue_task = asyncio.create_task(data_queue.get())
 
     try:
         while True:
-            # 使用 asyncio.gather 同时等待 队列数据 和 WS 消息
-            # 但为了简化，我们可以用 wait task
-            
-            # 创建读取 WS 的 task
-            recv_task = asyncio.create_task(websocket.receive_json())
-            # 创建读取 Queue 的 task
-            queue_task = asyncio.create_task(data_queue.get())
-            
-            done, pending = await asyncio.wait(
+            done, _ = await asyncio.wait(
                 [recv_task, queue_task], 
                 return_when=asyncio.FIRST_COMPLETED
             )
@@ -198,34 +284,12 @@ async def websocket_endpoint(websocket: WebSocket, serial: str):
                 if task == queue_task:
                     # 发送采集数据
                     data = task.result()
-                    await websocket.send_json(data)
-                    # Write CSV when recording and monitor payload
-                    if record_writer and isinstance(data, dict) and data.get("type") == "monitor":
-                        row = [
-                            data.get("timestamp"),
-                            data.get("package"),
-                            data.get("cpu"),
-                            data.get("memory"),
-                            data.get("fps"),
-                            data.get("jank"),
-                            data.get("stutter"),
-                            data.get("gpu"),
-                            data.get("battery", {}).get("level"),
-                            data.get("battery", {}).get("voltage"),
-                            data.get("battery", {}).get("temp"),
-                            data.get("battery", {}).get("current"),
-                            data.get("network", {}).get("rx"),
-                            data.get("network", {}).get("tx"),
-                        ]
-                        try:
-                            record_writer.writerow(row)
-                            if record_fp:
-                                record_fp.flush()
-                        except Exception as e:
-                            logger.error(f"Record write error: {e}")
+                    queue_task = asyncio.create_task(data_queue.get())
+                    await _send(websocket, data)
                 elif task == recv_task:
                     # 处理客户端指令
                     msg = task.result()
+                    recv_task = asyncio.create_task(websocket.receive_json())
                     # 比如 {"type": "start", "target": "com.example"}
                     if msg.get("type") == "start":
                         target = msg.get("target")
@@ -237,13 +301,10 @@ async def websocket_endpoint(websocket: WebSocket, serial: str):
                             ts_name = str(int(time.time() * 1000))
                             base_name = f"{ts_name}_{target or 'unknown'}.csv"
                             file_path = os.path.join(record_dir_serial, base_name)
-                            record_fp = open(file_path, "w", newline="", encoding="utf-8")
+                            record_fp = open(file_path, "w", newline="", encoding="utf-8", buffering=1 << 16)
+                            record_last_flush = time.monotonic()
                             record_writer = csv.writer(record_fp)
-                            record_writer.writerow([
-                                "timestamp","package","cpu(%)","memory(MB)","fps","jank","stutter(%)",
-                                "gpu(%)","battery.level","battery.voltage(mV)","battery.temp(C)",
-                                "battery.current(mA)","network.rx(KB/s)","network.tx(KB/s)"
-                            ])
+                            record_writer.writerow(MONITOR_CSV_HEADER)
                             logger.info(f"Recording to {file_path}")
                         except Exception as e:
                             logger.error(f"Failed to init recording: {e}")
@@ -254,29 +315,29 @@ async def websocket_endpoint(websocket: WebSocket, serial: str):
                             if record_fp:
                                 record_fp.flush()
                                 record_fp.close()
-                        except Exception:
+                        except OSError:
                             pass
                         record_fp = None
                         record_writer = None
 
-            # 取消未完成的任务
-            for task in pending:
-                task.cancel()
-
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected: {serial}")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
+        recv_task.cancel()
+        queue_task.cancel()
         collector.stop()
         try:
             if record_fp:
                 record_fp.flush()
                 record_fp.close()
-        except Exception:
+        except OSError:
             pass
         if serial in collectors:
             del collectors[serial]
+        # 测试期间可能安装/卸载了应用, 下次进入时重新获取
+        _apps_cache.pop(serial, None)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,11 +1,14 @@
 import unittest
+import struct
 import sys
 import os
 
 # Add backend to path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from core.android_collector import _parse_cpu_from_top, _parse_gpu_from_content
+from core.android_collector import (AndroidCollector, _parse_cpu_from_top, _parse_gpu_from_content, _parse_meminfo,
+                                   _split_sections, _split_cat_output, _parse_netdev, _parse_present_times, _calc_jank_stutter,
+                                   _image_from_screencap, _screencap_rejects_jpeg, _last_frame_timestamp)
 
 class TestAndroidParsers(unittest.TestCase):
 
@@ -61,5 +64,127 @@ Tasks: 2 total,   0 running,   2 sleeping,   0 stopped,   0 zombie
         content = "42"
         self.assertEqual(_parse_gpu_from_content(content, path), 42.0)
 
+    def test_split_sections(self):
+        output = "===PIDS===\r\n123,456\r\n===TOP===\r\n===NETDEV===\nwlan0: 1 2\n"
+        sections = _split_sections(output)
+        self.assertEqual(sections["PIDS"], "123,456")
+        self.assertEqual(sections["TOP"], "")
+        self.assertEqual(sections["NETDEV"], "wlan0: 1 2")
+
+    def test_split_cat_output(self):
+        output = ("##/sys/class/kgsl/kgsl-3d0/gpubusy\r\n##/sys/class/misc/mali0/device/utilization\r\n"
+                  "37\r\n##/sys/devices/platform/google,mali/gpu_utilization\n")
+        contents = _split_cat_output(output)
+        self.assertEqual(contents["/sys/class/kgsl/kgsl-3d0/gpubusy"], "")
+        self.assertEqual(contents["/sys/class/misc/mali0/device/utilization"], "37")
+        self.assertEqual(contents["/sys/devices/platform/google,mali/gpu_utilization"], "")
+
+    def test_netdev(self):
+        output = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:  5000      50    0    0    0     0          0         0     5000      50    0    0    0     0       0          0
+ wlan0: 1000000   900    0    0    0     0          0         0   200000     700    0    0    0     0       0          0
+rmnet_data0:3000      30    0    0    0     0          0         0     4000      40    0    0    0     0       0          0
+  tun0:  7000      70    0    0    0     0          0         0     8000      80    0    0    0     0       0          0
+"""
+        self.assertEqual(_parse_netdev(output), (1003000, 204000))
+        self.assertIsNone(_parse_netdev("    lo:  5000 50 0 0 0 0 0 0 5000 50 0 0 0 0 0 0\n"))
+
+    def test_meminfo(self):
+        output = """
+Applications Memory Usage (in Kilobytes):
+** MEMINFO in pid 13737 [com.example.app] **
+                   Pss  Private  Private  SwapPss      Rss     Heap     Heap     Heap
+                 Total    Dirty    Clean    Dirty    Total     Size    Alloc     Free
+                ------   ------   ------   ------   ------   ------   ------   ------
+  Native Heap    20480    20400        0        0    22000    40000    30000    10000
+        Stack     1024     1024        0        0     1100
+        TOTAL   204800   150000    30000        0   250000    40000    30000    10000
+
+ App Summary
+                       Pss(KB)                        Rss(KB)
+                        ------                         ------
+           Java Heap:    10240                          12000
+         Native Heap:    20480                          22000
+                Code:    30720                          40000
+               Stack:     1024                           1100
+            Graphics:    51200                          51200
+       Private Other:     2048
+              System:     3072
+             Unknown:                                    1000
+
+           TOTAL PSS:   204800            TOTAL RSS:   250000       TOTAL SWAP PSS:        0
+"""
+        self.assertEqual(_parse_meminfo(output), {
+            "total": 200.0,
+            "java": 10.0,
+            "native": 20.0,
+            "graphics": 50.0,
+            "code": 30.0,
+            "other": 6.0
+        })
+
+    def test_present_times_skip_pending(self):
+        lines = [
+            "0 0 0",
+            "100 200 1000",
+            "116 216 9223372036854775807",
+            "132 232 2000",
+            "garbage",
+        ]
+        self.assertEqual(_parse_present_times(lines), [1000, 2000])
+
+    def test_jank_stutter(self):
+        period = 16_000_000
+        # durations: 16ms, 48ms (jank, 32ms excess), 16ms
+        frames = [0, 16_000_000, 64_000_000, 80_000_000]
+        jank, stutter = _calc_jank_stutter(frames, period)
+        self.assertEqual(jank, 1)
+        self.assertEqual(stutter, 40.0)
+
+    def test_jank_stutter_single_frame(self):
+        self.assertEqual(_calc_jank_stutter([123], 16_000_000), (0, 0.0))
+
+    def test_screencap_raw(self):
+        pixels = bytes([1, 2, 3, 255, 4, 5, 6, 255])
+        # Android 12+ header carries an extra colorspace field
+        for header in (struct.pack("<III", 2, 1, 1), struct.pack("<IIII", 2, 1, 1, 0)):
+            img = _image_from_screencap(header + pixels)
+            self.assertEqual(img.mode, "RGB")
+            self.assertEqual(img.tobytes(), bytes([1, 2, 3, 4, 5, 6]))
+
+    def test_screencap_unknown_format(self):
+        self.assertIsNone(_image_from_screencap(struct.pack("<III", 1, 1, 99) + bytes(4)))
+        self.assertIsNone(_image_from_screencap(b"\x89PNG"))
+
+    def test_screencap_rejects_jpeg(self):
+        self.assertTrue(_screencap_rejects_jpeg(b"screencap: invalid option -- j\nusage: screencap [-hp] [-d display-id] [FILENAME]\n"))
+        self.assertFalse(_screencap_rejects_jpeg(b""))
+        self.assertFalse(_screencap_rejects_jpeg(b"Error: SurfaceFlinger capture failed\n"))
+
+    def test_last_frame_timestamp(self):
+        output = "16666666\n100 200 300\n400 500 9223372036854775807\n"
+        # Pending frame falls back to column 1
+        self.assertEqual(_last_frame_timestamp(output), 500)
+        self.assertIsNone(_last_frame_timestamp("16666666\n"))
+
+    def test_handle_log_line(self):
+        collector = AndroidCollector("emulator-5554")
+        collector.target_package = "com.example.app"
+        collector.current_pids = frozenset({"18791"})
+        # _logcat_loop 按块切分得到的是 bytearray
+        collector._handle_log_line(bytearray(b"02-09 14:54:50.447 18791 19854 E Tag: boom\n"))
+        collector._handle_log_line(bytearray(b"02-09 14:54:50.448 18791 19854 W Tag: warn only\n"))
+        collector._handle_log_line(bytearray(b"02-09 14:54:50.449  2001  2001 E Tag: other process\n"))
+        collector._handle_log_line(bytearray(b"02-09 14:54:50.450  2001  2001 E AndroidRuntime: FATAL EXCEPTION: main Process: com.example.app\n"))
+
+        entries = collector._log_buffer
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0]["level"], "error")
+        self.assertEqual(entries[0]["message"], "02-09 14:54:50.447 18791 19854 E Tag: boom")
+        self.assertFalse(entries[0]["is_crash"])
+        self.assertTrue(entries[1]["is_crash"])
+        self.assertIn("FATAL EXCEPTION", entries[1]["message"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -26,6 +26,22 @@ const state = reactive({
 
 let ws = null
 let reconnectTimer = null
+// Backend sends JSON as binary frames (UTF-8 bytes)
+const textDecoder = new TextDecoder()
+
+const pushLog = (entry) => {
+  if (state.logList.length > 1000) state.logList.shift() // Keep 1000 logs in store
+
+  const date = new Date(entry.timestamp)
+  const timeStr = `${date.getHours().toString().padStart(2,'0')}:${date.getMinutes().toString().padStart(2,'0')}:${date.getSeconds().toString().padStart(2,'0')}.${date.getMilliseconds().toString().padStart(3,'0')}`
+
+  state.logList.push({
+      time: timeStr,
+      message: entry.message,
+      level: entry.level,
+      isCrash: entry.is_crash
+  })
+}
 
 export const useMonitorStore = () => {
 
@@ -43,6 +59,7 @@ export const useMonitorStore = () => {
     
     console.log('Store: Connecting to WS:', wsUrl)
     ws = new WebSocket(wsUrl)
+    ws.binaryType = 'arraybuffer'
     
     ws.onopen = () => {
       console.log('Store: WS Connected')
@@ -53,7 +70,7 @@ export const useMonitorStore = () => {
     }
 
     ws.onmessage = (event) => {
-      const data = JSON.parse(event.data)
+      const data = JSON.parse(typeof event.data === 'string' ? event.data : textDecoder.decode(event.data))
       
       // Handle Screenshot
       if (data.type === 'screenshot') {
@@ -65,17 +82,14 @@ export const useMonitorStore = () => {
 
       // Handle Log
       if (data.type === 'log') {
-        if (state.logList.length > 1000) state.logList.shift() // Keep 1000 logs in store
-        
-        const date = new Date(data.timestamp)
-        const timeStr = `${date.getHours().toString().padStart(2,'0')}:${date.getMinutes().toString().padStart(2,'0')}:${date.getSeconds().toString().padStart(2,'0')}.${date.getMilliseconds().toString().padStart(3,'0')}`
-        
-        state.logList.push({
-            time: timeStr,
-            message: data.message,
-            level: data.level,
-            isCrash: data.is_crash
-        })
+        pushLog(data)
+        state.lastLogUpdate = Date.now()
+        return
+      }
+
+      // Handle batched logs
+      if (data.type === 'log_batch') {
+        data.entries.forEach(pushLog)
         state.lastLogUpdate = Date.now()
         return
       }